@@ -1,33 +1,77 @@
-from fastapi import FastAPI, APIRouter, File, UploadFile, HTTPException, Form
-from fastapi.responses import JSONResponse
+from fastapi import FastAPI, APIRouter, File, UploadFile, HTTPException, Form, Query, Request
+from fastapi.routing import APIRoute
+from fastapi.responses import JSONResponse, ORJSONResponse, Response, StreamingResponse
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
-from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import AsyncMongoClient, ReturnDocument
 import os
+import asyncio
+import time
+import zlib
 import logging
 from pathlib import Path
 from pydantic import BaseModel, Field, ConfigDict
-from typing import List, Optional
+from typing import List, Optional, Union
 import uuid
 from datetime import datetime, timezone
 import json
+import orjson
 from biometric_engine import IrisBiometricEngine, SyntheticIrisGenerator
 import hashlib
+import hmac
+from functools import lru_cache
+from cachetools import TTLCache
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
 
-# MongoDB connection
+# MongoDB connection (minPoolSize keeps warm connections for the first requests)
 mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
+client = AsyncMongoClient(
+    mongo_url,
+    maxPoolSize=int(os.environ.get('MONGO_MAX_POOL_SIZE', 50)),
+    minPoolSize=int(os.environ.get('MONGO_MIN_POOL_SIZE', 10)),
+    waitQueueTimeoutMS=2000
+)
 db = client[os.environ['DB_NAME']]
 
 # Biometric engine
 bio_engine = IrisBiometricEngine()
+iris_generator = SyntheticIrisGenerator()
+
+# Cap on a decompressed request body (guards against gzip bombs)
+_MAX_GZIP_BODY_BYTES = 32 * 1024 * 1024
+
+class GzipRequest(Request):
+    """Request whose body is gunzipped when sent with Content-Encoding: gzip"""
+    
+    async def body(self) -> bytes:
+        if not hasattr(self, "_body"):
+            body = await super().body()
+            if "gzip" in self.headers.getlist("Content-Encoding"):
+                decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+                body = decompressor.decompress(body, _MAX_GZIP_BODY_BYTES)
+                if decompressor.unconsumed_tail:
+                    raise HTTPException(status_code=413, detail="Decompressed request body too large")
+            self._body = body
+        return self._body
+
+class GzipRoute(APIRoute):
+    """Route that accepts gzip-compressed request bodies (large frame uploads)"""
+    
+    def get_route_handler(self):
+        original_route_handler = super().get_route_handler()
+        
+        async def route_handler(request: Request):
+            return await original_route_handler(GzipRequest(request.scope, request.receive))
+        
+        return route_handler
 
 # Create the main app
-app = FastAPI(title="IrisVault API")
+app = FastAPI(title="IrisVault API", default_response_class=ORJSONResponse)
 api_router = APIRouter(prefix="/api")
+# Only the frame-upload endpoints accept gzip-compressed bodies
+gzip_router = APIRouter(prefix="/api", route_class=GzipRoute)
 
 # Configure logging
 logging.basicConfig(
@@ -41,11 +85,12 @@ logger = logging.getLogger(__name__)
 class User(BaseModel):
     model_config = ConfigDict(extra="ignore")
     
-    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    id: str = Field(default_factory=lambda: _new_id())
     name: str
     account_number: str
     email: str
     balance: float = 10000.0  # Starting balance
+    fallback_pin_mac: Optional[bytes] = None  # HMAC of the fallback PIN (see _pin_digest)
     created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
 
 class UserCreate(BaseModel):
@@ -56,17 +101,17 @@ class UserCreate(BaseModel):
 class BiometricTemplate(BaseModel):
     model_config = ConfigDict(extra="ignore")
     
-    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    id: str = Field(default_factory=lambda: _new_id())
     user_id: str
     account_number: str
-    template_blob: str  # Encrypted template
+    template_blob: bytes  # Encrypted template (stored as BSON binary)
     template_meta: dict
     created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
 
 class AuditLog(BaseModel):
     model_config = ConfigDict(extra="ignore")
     
-    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    id: str = Field(default_factory=lambda: _new_id())
     user_id: Optional[str] = None
     account_number: Optional[str] = None
     event_type: str
@@ -78,7 +123,7 @@ class AuditLog(BaseModel):
 class Transaction(BaseModel):
     model_config = ConfigDict(extra="ignore")
     
-    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    id: str = Field(default_factory=lambda: _new_id())
     user_id: str
     account_number: str
     type: str  # withdraw, deposit, check
@@ -91,11 +136,11 @@ class EnrollRequest(BaseModel):
     account_number: str
     email: str
     consent: bool
-    frames: List[str]  # base64 encoded images
+    frames: List[Union[str, bytes]]  # base64 encoded images (raw bytes from /upload)
 
 class VerifyRequest(BaseModel):
     account_number: str
-    frames: List[str]
+    frames: List[Union[str, bytes]]
 
 class TransactionRequest(BaseModel):
     account_number: str
@@ -109,41 +154,155 @@ class FallbackRequest(BaseModel):
 
 # ============= HELPER FUNCTIONS =============
 
+_ORJSON_NUMPY_OPTS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NAIVE_UTC | orjson.OPT_NON_STR_KEYS
+
 def convert_numpy_types(obj):
     """Convert numpy types to Python native types for JSON serialization"""
-    import numpy as np
-    if isinstance(obj, dict):
-        return {k: convert_numpy_types(v) for k, v in obj.items()}
-    elif isinstance(obj, list):
-        return [convert_numpy_types(v) for v in obj]
-    elif isinstance(obj, np.bool_):
-        return bool(obj)
-    elif isinstance(obj, np.integer):
-        return int(obj)
-    elif isinstance(obj, np.floating):
-        return float(obj)
-    elif isinstance(obj, np.ndarray):
-        return obj.tolist()
-    else:
-        return obj
-
-async def log_audit(event_type: str, account_number: str = None, user_id: str = None, 
-                   success: bool = True, details: dict = {}):
-    """Log audit event"""
+    # orjson converts numpy scalars/arrays in C; far cheaper than a Python walk
+    return orjson.loads(orjson.dumps(obj, option=_ORJSON_NUMPY_OPTS))
+
+def _new_id() -> str:
+    """Time-ordered UUIDv7 string, so consecutive inserts stay close in indexes"""
+    rand = int.from_bytes(os.urandom(10), 'big')
+    value = (
+        (time.time_ns() // 1_000_000) << 80  # 48-bit unix ms timestamp
+        | 0x7 << 76                          # version 7
+        | (rand >> 68) << 64                 # 12 random bits
+        | 0b10 << 62                         # RFC 4122 variant
+        | (rand & ((1 << 62) - 1))           # 62 random bits
+    )
+    return str(uuid.UUID(int=value))
+
+def _now_iso() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+# Insert documents are built as plain dicts in the shape of the models above;
+# going through model_dump() plus timestamp fix-ups costs several passes per write.
+
+@lru_cache(maxsize=8192)
+def _fallback_pin(account_number: str) -> str:
+    """Demo fallback PIN for an account (deterministic, so cached)"""
+    return hashlib.md5(account_number.encode()).hexdigest()[:6]
+
+# PIN MAC key derived from the engine key, so the template encryption key
+# itself is never used for a second primitive
+_PIN_KEY = hmac.new(bio_engine.key_hash, b"fallback-pin", hashlib.sha256).digest()
+
+def _pin_digest(account_number: str, pin: str) -> bytes:
+    """HMAC-SHA256 of a fallback PIN, salted with the account number"""
+    return hmac.new(_PIN_KEY, f"{account_number}:{pin}".encode(), hashlib.sha256).digest()
+
+_STREAM_CHUNK_BYTES = 64 * 1024
+
+async def _stream_documents(key: str, cursor):
+    """Stream a cursor as {key: [...], "count": n} without building the list first
+    
+    Documents are serialized as they arrive and sent in ~64 KB chunks. The
+    first document is fetched before the response starts, so query and
+    connection errors still reach the caller as exceptions.
+    """
+    docs = cursor.__aiter__()
+    try:
+        first = await docs.__anext__()
+    except StopAsyncIteration:
+        first = None
+    
+    async def body():
+        count = 0
+        chunk = bytearray(b'{"' + key.encode() + b'":[')
+        if first is not None:
+            chunk += orjson.dumps(first, option=_ORJSON_NUMPY_OPTS)
+            count = 1
+            try:
+                async for doc in docs:
+                    chunk += b','
+                    chunk += orjson.dumps(doc, option=_ORJSON_NUMPY_OPTS)
+                    count += 1
+                    if len(chunk) >= _STREAM_CHUNK_BYTES:
+                        yield bytes(chunk)
+                        chunk.clear()
+            except Exception as e:
+                # Headers are already sent; abort the response rather than
+                # closing the array with a wrong count
+                logger.error(f"Streaming {key} error: {e}")
+                raise
+        chunk += b'],"count":' + str(count).encode() + b'}'
+        yield bytes(chunk)
+    
+    return StreamingResponse(body(), media_type="application/json")
+
+# Recently used user docs; an ATM session hits the same account several times
+# in quick succession (fallback PIN -> verify)
+_user_cache = TTLCache(maxsize=10_000, ttl=30)
+# Only fields that never change after enrollment; balance is always read from
+# Mongo so a concurrent (or other-worker) transaction can't leave it stale
+_USER_PROJECTION = {"_id": 0, "id": 1, "name": 1, "account_number": 1, "fallback_pin_mac": 1}
+_BALANCE_PROJECTION = {"_id": 0, "id": 1, "name": 1, "balance": 1}
+
+async def _get_user(account_number: str):
+    """Fetch a user doc, served from the TTL cache when possible"""
+    user = _user_cache.get(account_number)
+    if user is None:
+        user = await db.users.find_one({"account_number": account_number}, _USER_PROJECTION)
+        if user:
+            _user_cache[account_number] = user
+    return user
+
+# Strong references to in-flight background tasks (the loop only keeps weak ones)
+_bg_tasks: set = set()
+
+def _spawn(coro):
+    """Run a coroutine in the background without delaying the response"""
+    task = asyncio.create_task(coro)
+    _bg_tasks.add(task)
+    task.add_done_callback(_bg_tasks.discard)
+    return task
+
+# Audit events are queued and written in batches by _audit_flusher
+_audit_queue: asyncio.Queue = asyncio.Queue()
+_AUDIT_BATCH_SIZE = 500
+_AUDIT_FLUSH_INTERVAL = 0.1  # seconds
+
+async def _write_audit_batch(batch):
+    try:
+        await db.audit_logs.insert_many(batch, ordered=False)
+    except Exception as e:
+        logger.error(f"Audit log error: {e}")
+
+async def _audit_flusher():
+    """Drain queued audit docs into insert_many batches until a None sentinel"""
+    while True:
+        doc = await _audit_queue.get()
+        if doc is None:
+            return
+        batch = [doc]
+        # Give concurrent requests a moment to add to this batch
+        await asyncio.sleep(_AUDIT_FLUSH_INTERVAL)
+        while len(batch) < _AUDIT_BATCH_SIZE and not _audit_queue.empty():
+            doc = _audit_queue.get_nowait()
+            if doc is None:
+                await _write_audit_batch(batch)
+                return
+            batch.append(doc)
+        await _write_audit_batch(batch)
+
+def log_audit(event_type: str, account_number: str = None, user_id: str = None, 
+              success: bool = True, details: Optional[dict] = None):
+    """Log audit event (queued; written in the background)"""
     try:
         # Convert numpy types to Python types
-        clean_details = convert_numpy_types(details)
+        clean_details = convert_numpy_types(details) if details else {}
         
-        log = AuditLog(
-            user_id=user_id,
-            account_number=account_number,
-            event_type=event_type,
-            success=success,
-            details=clean_details
-        )
-        doc = log.model_dump()
-        doc['timestamp'] = doc['timestamp'].isoformat()
-        await db.audit_logs.insert_one(doc)
+        _audit_queue.put_nowait({
+            'id': _new_id(),
+            'user_id': user_id,
+            'account_number': account_number,
+            'event_type': event_type,
+            'device_info': "webcam",
+            'success': success,
+            'details': clean_details,
+            'timestamp': _now_iso()
+        })
     except Exception as e:
         logger.error(f"Audit log error: {e}")
 
@@ -153,7 +312,7 @@ async def log_audit(event_type: str, account_number: str = None, user_id: str =
 async def root():
     return {"message": "IrisVault API - Biometric ATM System", "version": "1.0"}
 
-@api_router.post("/enroll")
+@gzip_router.post("/enroll")
 async def enroll_user(request: EnrollRequest):
     """Enroll new user with iris biometrics"""
     try:
@@ -162,7 +321,7 @@ async def enroll_user(request: EnrollRequest):
             raise HTTPException(status_code=400, detail="Biometric consent required")
         
         # Check if account exists
-        existing = await db.users.find_one({"account_number": request.account_number})
+        existing = await db.users.find_one({"account_number": request.account_number}, {"_id": 1})
         if existing:
             raise HTTPException(status_code=400, detail="Account already enrolled")
         
@@ -170,10 +329,14 @@ async def enroll_user(request: EnrollRequest):
         if len(request.frames) < 3:
             raise HTTPException(status_code=400, detail="Minimum 3 frames required")
         
+        # Decode and analyze frames once for both liveness and template stages
+        frames = bio_engine.decode_frames(request.frames)
+        analysis = bio_engine.analyze_frames(frames)
+        
         # Check liveness
-        liveness_result = bio_engine.check_liveness(request.frames)
+        liveness_result = bio_engine.check_liveness(analysis=analysis)
         if not liveness_result['is_live']:
-            await log_audit(
+            log_audit(
                 "enrollment_failed",
                 account_number=request.account_number,
                 success=False,
@@ -185,9 +348,9 @@ async def enroll_user(request: EnrollRequest):
             )
         
         # Create template
-        template_data = bio_engine.create_template(request.frames)
+        template_data = bio_engine.create_template(analysis=analysis)
         if template_data is None:
-            await log_audit(
+            log_audit(
                 "enrollment_failed",
                 account_number=request.account_number,
                 success=False,
@@ -201,36 +364,38 @@ async def enroll_user(request: EnrollRequest):
             raise HTTPException(status_code=500, detail="Encryption failed")
         
         # Create user
-        user = User(
-            name=request.name,
-            account_number=request.account_number,
-            email=request.email
-        )
-        user_doc = user.model_dump()
-        user_doc['created_at'] = user_doc['created_at'].isoformat()
-        await db.users.insert_one(user_doc)
+        created_at = _now_iso()
+        user_id = _new_id()
+        await db.users.insert_one({
+            'id': user_id,
+            'name': request.name,
+            'account_number': request.account_number,
+            'email': request.email,
+            'balance': 10000.0,  # Starting balance
+            'fallback_pin_mac': _pin_digest(request.account_number, _fallback_pin(request.account_number)),
+            'created_at': created_at
+        })
         
         # Store biometric template
-        bio_template = BiometricTemplate(
-            user_id=user.id,
-            account_number=request.account_number,
-            template_blob=encrypted_template,
-            template_meta={
+        await db.biometrics.insert_one({
+            'id': _new_id(),
+            'user_id': user_id,
+            'account_number': request.account_number,
+            'template_blob': encrypted_template,
+            'template_meta': {
                 'quality_score': template_data['quality_score'],
                 'num_frames': template_data['num_frames'],
                 'algorithm': 'iris_classical_cv',
                 'liveness_confidence': liveness_result.get('confidence', 0)
-            }
-        )
-        bio_doc = bio_template.model_dump()
-        bio_doc['created_at'] = bio_doc['created_at'].isoformat()
-        await db.biometrics.insert_one(bio_doc)
+            },
+            'created_at': created_at
+        })
         
         # Log success
-        await log_audit(
+        log_audit(
             "enrollment_success",
             account_number=request.account_number,
-            user_id=user.id,
+            user_id=user_id,
             success=True,
             details={
                 'quality_score': template_data['quality_score'],
@@ -240,7 +405,7 @@ async def enroll_user(request: EnrollRequest):
         
         return {
             "success": True,
-            "enrollment_id": user.id,
+            "enrollment_id": user_id,
             "account_number": request.account_number,
             "quality_score": template_data['quality_score'],
             "message": "Enrollment successful"
@@ -252,14 +417,34 @@ async def enroll_user(request: EnrollRequest):
         logger.error(f"Enrollment error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
-@api_router.post("/verify")
+@api_router.post("/enroll/upload")
+async def enroll_user_upload(name: str = Form(...), account_number: str = Form(...),
+                             email: str = Form(...), consent: bool = Form(...),
+                             frames: List[UploadFile] = File(...)):
+    """Enroll with frames sent as multipart image files (no base64 round trip)"""
+    request = EnrollRequest(
+        name=name,
+        account_number=account_number,
+        email=email,
+        consent=consent,
+        frames=[await frame.read() for frame in frames]
+    )
+    return await enroll_user(request)
+
+@gzip_router.post("/verify")
 async def verify_user(request: VerifyRequest):
     """Verify user using iris biometrics"""
     try:
-        # Find user and template
-        user = await db.users.find_one({"account_number": request.account_number})
+        # Find user and template (both lookups in flight at once)
+        user, bio_template = await asyncio.gather(
+            _get_user(request.account_number),
+            db.biometrics.find_one(
+                {"account_number": request.account_number},
+                {"_id": 0, "template_blob": 1}
+            )
+        )
         if not user:
-            await log_audit(
+            log_audit(
                 "verification_failed",
                 account_number=request.account_number,
                 success=False,
@@ -267,7 +452,6 @@ async def verify_user(request: VerifyRequest):
             )
             raise HTTPException(status_code=404, detail="Account not found")
         
-        bio_template = await db.biometrics.find_one({"account_number": request.account_number})
         if not bio_template:
             raise HTTPException(status_code=404, detail="Biometric template not found")
         
@@ -275,10 +459,14 @@ async def verify_user(request: VerifyRequest):
         if len(request.frames) < 2:
             raise HTTPException(status_code=400, detail="Minimum 2 frames required")
         
+        # Decode and analyze frames once for both liveness and template stages
+        frames = bio_engine.decode_frames(request.frames)
+        analysis = bio_engine.analyze_frames(frames)
+        
         # Check liveness
-        liveness_result = bio_engine.check_liveness(request.frames)
+        liveness_result = bio_engine.check_liveness(analysis=analysis)
         if not liveness_result['is_live']:
-            await log_audit(
+            log_audit(
                 "verification_failed",
                 account_number=request.account_number,
                 user_id=user['id'],
@@ -293,9 +481,9 @@ async def verify_user(request: VerifyRequest):
             }
         
         # Create template from verification frames
-        verify_template_data = bio_engine.create_template(request.frames)
+        verify_template_data = bio_engine.create_template(analysis=analysis)
         if verify_template_data is None:
-            await log_audit(
+            log_audit(
                 "verification_failed",
                 account_number=request.account_number,
                 user_id=user['id'],
@@ -316,7 +504,7 @@ async def verify_user(request: VerifyRequest):
         )
         
         # Log result
-        await log_audit(
+        log_audit(
             "verification_success" if match_result['match'] else "verification_failed",
             account_number=request.account_number,
             user_id=user['id'],
@@ -351,11 +539,21 @@ async def verify_user(request: VerifyRequest):
         logger.error(f"Verification error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@api_router.post("/verify/upload")
+async def verify_user_upload(account_number: str = Form(...),
+                             frames: List[UploadFile] = File(...)):
+    """Verify with frames sent as multipart image files (no base64 round trip)"""
+    request = VerifyRequest(
+        account_number=account_number,
+        frames=[await frame.read() for frame in frames]
+    )
+    return await verify_user(request)
+
 @api_router.get("/account/{account_number}/balance")
 async def get_balance(account_number: str):
     """Get account balance"""
     try:
-        user = await db.users.find_one({"account_number": account_number})
+        user = await db.users.find_one({"account_number": account_number}, _BALANCE_PROJECTION)
         if not user:
             raise HTTPException(status_code=404, detail="Account not found")
         
@@ -374,49 +572,53 @@ async def get_balance(account_number: str):
 async def create_transaction(request: TransactionRequest):
     """Create transaction (withdraw/deposit/check)"""
     try:
-        user = await db.users.find_one({"account_number": request.account_number})
-        if not user:
-            raise HTTPException(status_code=404, detail="Account not found")
-        
-        current_balance = user.get('balance', 0)
-        
-        if request.type == 'withdraw':
+        if request.type in ('withdraw', 'deposit'):
             if request.amount <= 0:
                 raise HTTPException(status_code=400, detail="Invalid amount")
-            if current_balance < request.amount:
-                raise HTTPException(status_code=400, detail="Insufficient funds")
-            new_balance = current_balance - request.amount
             
-        elif request.type == 'deposit':
-            if request.amount <= 0:
-                raise HTTPException(status_code=400, detail="Invalid amount")
-            new_balance = current_balance + request.amount
+            # Atomic balance update; a withdrawal only matches if funds suffice
+            query = {"account_number": request.account_number}
+            delta = request.amount
+            if request.type == 'withdraw':
+                query["balance"] = {"$gte": request.amount}
+                delta = -request.amount
+            user = await db.users.find_one_and_update(
+                query,
+                {"$inc": {"balance": delta}},
+                projection={"_id": 0, "id": 1, "balance": 1},
+                return_document=ReturnDocument.AFTER
+            )
+            if not user:
+                # Only on the failure path: tell a missing account from low funds
+                if request.type == 'withdraw' and await db.users.find_one(
+                    {"account_number": request.account_number}, {"_id": 1}
+                ):
+                    raise HTTPException(status_code=400, detail="Insufficient funds")
+                raise HTTPException(status_code=404, detail="Account not found")
             
         elif request.type == 'check':
-            new_balance = current_balance
+            user = await db.users.find_one({"account_number": request.account_number}, _BALANCE_PROJECTION)
+            if not user:
+                raise HTTPException(status_code=404, detail="Account not found")
         else:
             raise HTTPException(status_code=400, detail="Invalid transaction type")
         
-        # Update balance
-        await db.users.update_one(
-            {"account_number": request.account_number},
-            {"$set": {"balance": new_balance}}
-        )
+        new_balance = user.get('balance', 0)
         
         # Create transaction record
-        transaction = Transaction(
-            user_id=user['id'],
-            account_number=request.account_number,
-            type=request.type,
-            amount=request.amount,
-            balance_after=new_balance
-        )
-        trans_doc = transaction.model_dump()
-        trans_doc['timestamp'] = trans_doc['timestamp'].isoformat()
-        await db.transactions.insert_one(trans_doc)
+        transaction_id = _new_id()
+        await db.transactions.insert_one({
+            'id': transaction_id,
+            'user_id': user['id'],
+            'account_number': request.account_number,
+            'type': request.type,
+            'amount': request.amount,
+            'balance_after': new_balance,
+            'timestamp': _now_iso()
+        })
         
         # Log audit
-        await log_audit(
+        log_audit(
             f"transaction_{request.type}",
             account_number=request.account_number,
             user_id=user['id'],
@@ -426,7 +628,7 @@ async def create_transaction(request: TransactionRequest):
         
         return {
             "success": True,
-            "transaction_id": transaction.id,
+            "transaction_id": transaction_id,
             "type": request.type,
             "amount": request.amount,
             "balance": new_balance
@@ -442,16 +644,19 @@ async def create_transaction(request: TransactionRequest):
 async def fallback_verify(request: FallbackRequest):
     """Fallback verification using simulated fingerprint (PIN)"""
     try:
-        user = await db.users.find_one({"account_number": request.account_number})
+        user = await _get_user(request.account_number)
         if not user:
             raise HTTPException(status_code=404, detail="Account not found")
         
         # Simulate fingerprint verification with PIN
-        # For demo: hash of account_number is the "correct" PIN
-        expected_pin = hashlib.md5(request.account_number.encode()).hexdigest()[:6]
+        # For demo: hash of account_number is the "correct" PIN; its HMAC is
+        # stored at enrollment (computed here for accounts enrolled before that)
+        expected = user.get('fallback_pin_mac')
+        if expected is None:
+            expected = _pin_digest(request.account_number, _fallback_pin(request.account_number))
         
-        if request.fingerprint_pin == expected_pin:
-            await log_audit(
+        if hmac.compare_digest(_pin_digest(request.account_number, request.fingerprint_pin), bytes(expected)):
+            log_audit(
                 "fallback_verification_success",
                 account_number=request.account_number,
                 user_id=user['id'],
@@ -466,7 +671,7 @@ async def fallback_verify(request: FallbackRequest):
                 "method": "fallback_fingerprint"
             }
         else:
-            await log_audit(
+            log_audit(
                 "fallback_verification_failed",
                 account_number=request.account_number,
                 user_id=user['id'],
@@ -488,15 +693,14 @@ async def fallback_verify(request: FallbackRequest):
 @api_router.get("/fallback/pin/{account_number}")
 async def get_fallback_pin(account_number: str):
     """Get fallback PIN for demo purposes"""
-    pin = hashlib.md5(account_number.encode()).hexdigest()[:6]
+    pin = _fallback_pin(account_number)
     return {"account_number": account_number, "demo_pin": pin}
 
 @api_router.get("/admin/users")
 async def get_all_users():
     """Admin: Get all enrolled users"""
     try:
-        users = await db.users.find({}, {"_id": 0}).to_list(1000)
-        return {"users": users, "count": len(users)}
+        return await _stream_documents("users", db.users.find({}, {"_id": 0, "fallback_pin_mac": 0}))
     except Exception as e:
         logger.error(f"Admin users error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -505,8 +709,9 @@ async def get_all_users():
 async def get_audit_logs(limit: int = 100):
     """Admin: Get audit logs"""
     try:
-        logs = await db.audit_logs.find({}, {"_id": 0}).sort("timestamp", -1).limit(limit).to_list(limit)
-        return {"logs": logs, "count": len(logs)}
+        return await _stream_documents(
+            "logs", db.audit_logs.find({}, {"_id": 0}).sort("timestamp", -1).limit(limit)
+        )
     except Exception as e:
         logger.error(f"Admin logs error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -515,11 +720,10 @@ async def get_audit_logs(limit: int = 100):
 async def get_biometrics_metadata():
     """Admin: Get biometric metadata (not raw templates)"""
     try:
-        biometrics = await db.biometrics.find(
+        return await _stream_documents("biometrics", db.biometrics.find(
             {},
             {"_id": 0, "template_blob": 0}  # Exclude encrypted template
-        ).to_list(1000)
-        return {"biometrics": biometrics, "count": len(biometrics)}
+        ))
     except Exception as e:
         logger.error(f"Admin biometrics error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -528,27 +732,36 @@ async def get_biometrics_metadata():
 async def get_transactions(account_number: str, limit: int = 50):
     """Get transaction history"""
     try:
-        transactions = await db.transactions.find(
+        return await _stream_documents("transactions", db.transactions.find(
             {"account_number": account_number},
             {"_id": 0}
-        ).sort("timestamp", -1).limit(limit).to_list(limit)
-        return {"transactions": transactions, "count": len(transactions)}
+        ).sort("timestamp", -1).limit(limit))
     except Exception as e:
         logger.error(f"Transactions error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 @api_router.get("/generate-synthetic-iris")
-async def generate_synthetic_iris(seed: Optional[int] = None):
-    """Generate synthetic iris image for testing"""
+async def generate_synthetic_iris(seed: Optional[int] = None,
+                                  response_format: str = Query("binary", alias="format")):
+    """Generate synthetic iris image for testing
+    
+    Returns the JPEG bytes directly; pass format=base64 for the
+    {"image": data URL} JSON form.
+    """
     try:
-        img_base64 = SyntheticIrisGenerator.generate(seed=seed)
-        return {"image": img_base64}
+        if response_format == "base64":
+            return {"image": iris_generator.generate_data_url(seed=seed)}
+        
+        # Seeded images are deterministic, so they can be cached
+        headers = {"Cache-Control": "public, max-age=3600"} if seed is not None else {}
+        return Response(content=iris_generator.generate(seed=seed), media_type="image/jpeg", headers=headers)
     except Exception as e:
         logger.error(f"Synthetic generation error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 # Include router
 app.include_router(api_router)
+app.include_router(gzip_router)
 
 app.add_middleware(
     CORSMiddleware,
@@ -558,6 +771,24 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.on_event("startup")
+async def start_audit_flusher():
+    _spawn(_audit_flusher())
+
+@app.on_event("startup")
+async def ensure_indexes():
+    """Index the account_number lookups and timestamp-sorted listings"""
+    try:
+        await db.users.create_index("account_number", unique=True)
+        await db.biometrics.create_index("account_number", unique=True)
+        await db.transactions.create_index([("account_number", 1), ("timestamp", -1)])
+        await db.audit_logs.create_index([("timestamp", -1)])
+    except Exception as e:
+        logger.error(f"Index creation error: {e}")
+
 @app.on_event("shutdown")
 async def shutdown_db_client():
-    client.close()
+    # Flush queued audit logs before the connection goes away
+    _audit_queue.put_nowait(None)
+    await asyncio.gather(*_bg_tasks, return_exceptions=True)
+    await client.close()
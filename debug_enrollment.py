@@ -1,24 +1,37 @@
 import requests
+from requests.adapters import HTTPAdapter
 import json
+from concurrent.futures import ThreadPoolExecutor
 
 # Test enrollment with debug info
 base_url = "https://biometric-banking.preview.emergentagent.com"
 api_url = f"{base_url}/api"
 
-# Generate a single synthetic iris
-print("Generating synthetic iris...")
-response = requests.get(f"{api_url}/generate-synthetic-iris?seed=100")
-if response.status_code == 200:
-    frame1 = response.json()['image']
-    print("✅ Frame 1 generated")
-else:
-    print(f"❌ Failed to generate frame 1: {response.status_code}")
+# Shared keep-alive session so only the first request pays for the TLS handshake
+SESSION = requests.Session()
+_adapter = HTTPAdapter(pool_connections=10, pool_maxsize=50)
+SESSION.mount('https://', _adapter)
+SESSION.mount('http://', _adapter)
+
+# Generate synthetic irises with different seeds (fetched concurrently)
+print("Generating synthetic irises...")
+seeds = [100, 200, 300, 400, 500]
+with ThreadPoolExecutor(max_workers=len(seeds)) as executor:
+    responses = list(executor.map(
+        lambda seed: SESSION.get(
+            f"{api_url}/generate-synthetic-iris",
+            params={"seed": seed, "format": "base64"},
+            timeout=30
+        ),
+        seeds
+    ))
+
+if responses[0].status_code != 200:
+    print(f"❌ Failed to generate frame 1: {responses[0].status_code}")
     exit(1)
 
-# Generate more frames with different seeds
-frames = [frame1]
-for seed in [200, 300, 400, 500]:
-    response = requests.get(f"{api_url}/generate-synthetic-iris?seed={seed}")
+frames = []
+for seed, response in zip(seeds, responses):
     if response.status_code == 200:
         frames.append(response.json()['image'])
         print(f"✅ Frame with seed {seed} generated")
@@ -37,7 +50,7 @@ enrollment_data = {
 }
 
 print("\nTesting enrollment...")
-response = requests.post(f"{api_url}/enroll", json=enrollment_data)
+response = SESSION.post(f"{api_url}/enroll", json=enrollment_data)
 print(f"Status: {response.status_code}")
 print(f"Response: {response.text}")
 
@@ -0,0 +1,24 @@
+import os
+import sys
+
+import pytest
+
+# The backend modules are imported as top-level modules (as server.py does)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'backend'))
+
+from biometric_engine import IrisBiometricEngine, SyntheticIrisGenerator  # noqa: E402
+
+
+@pytest.fixture(scope="session")
+def engine():
+    return IrisBiometricEngine(encryption_key="test_key")
+
+
+@pytest.fixture(scope="session")
+def templates(engine):
+    """Float templates for a few synthetic subjects, three frames each"""
+    generator = SyntheticIrisGenerator()
+    return [
+        engine.create_template([generator.generate(seed=subject * 10 + k) for k in range(3)])['template']
+        for subject in range(10)
+    ]
@@ -0,0 +1,50 @@
+import numpy as np
+import pytest
+from skimage.feature import hog, local_binary_pattern
+
+from biometric_engine import (
+    SyntheticIrisGenerator, _hog_top_cell_row, _lbp_sampling_offsets, _lbp_uniform_u8, _uniform_lbp_lut
+)
+
+
+@pytest.fixture(scope="module")
+def iris_crop(engine):
+    """128x128 iris region from a fixed synthetic image, as enrollment sees it"""
+    frame = SyntheticIrisGenerator().generate(seed=42)
+    crop = engine.detect_iris_region(engine.preprocess_frame(frame))
+    assert crop.shape == (128, 128) and crop.dtype == np.uint8
+    return crop
+
+
+def _noise_crop():
+    return np.random.default_rng(3).integers(0, 256, (128, 128), dtype=np.uint8)
+
+
+def _lbp(img):
+    rp, cp = _lbp_sampling_offsets(8, 1)
+    return _lbp_uniform_u8(img, rp, cp, _uniform_lbp_lut(8), np.empty(img.shape, dtype=np.uint8))
+
+
+@pytest.mark.parametrize("crop", ["iris", "noise"])
+def test_lbp_matches_skimage(crop, iris_crop):
+    img = iris_crop if crop == "iris" else _noise_crop()
+    expected = local_binary_pattern(img, P=8, R=1, method='uniform')
+    np.testing.assert_array_equal(_lbp(img), expected)
+
+
+def test_lbp_histogram_matches_skimage(engine, iris_crop):
+    expected = local_binary_pattern(iris_crop, P=8, R=1, method='uniform')
+    hist, _ = np.histogram(expected.ravel(), bins=32, range=(0, 32))
+    hist = hist.astype('float32')
+    hist /= (hist.sum() + 1e-7)
+    # The feature vector is L2-normalized as a whole, so compare proportions
+    lbp_features = engine.extract_features(iris_crop)[:32]
+    np.testing.assert_allclose(lbp_features / lbp_features.sum(), hist, rtol=1e-5, atol=1e-7)
+
+
+@pytest.mark.parametrize("crop", ["iris", "noise"])
+def test_hog_top_cell_row_matches_skimage(crop, iris_crop):
+    img = iris_crop if crop == "iris" else _noise_crop()
+    expected = hog(img, orientations=8, pixels_per_cell=(16, 16),
+                   cells_per_block=(1, 1), visualize=False)[:64]
+    np.testing.assert_allclose(_hog_top_cell_row(img, cell=16, orientations=8), expected, atol=1e-6)
@@ -0,0 +1,26 @@
+import numpy as np
+import pytest
+
+from biometric_engine import SyntheticIrisGenerator, b64encode
+
+
+@pytest.fixture(scope="module")
+def jpeg():
+    return SyntheticIrisGenerator().generate(seed=1)
+
+
+@pytest.mark.parametrize("wrap", [
+    bytes, bytearray, memoryview,
+    lambda data: b64encode(data).decode(),
+    lambda data: "data:image/jpeg;base64," + b64encode(data).decode(),
+])
+def test_frame_inputs_decode_alike(engine, jpeg, wrap):
+    expected = engine._decode_frame(jpeg)
+    assert expected is not None and expected.ndim == 2
+    np.testing.assert_array_equal(engine._decode_frame(wrap(jpeg)), expected)
+    np.testing.assert_array_equal(engine.preprocess_frame(wrap(jpeg)), engine.preprocess_frame(expected))
+
+
+def test_undecodable_frame(engine):
+    assert engine._decode_frame(b"not an image") is None
+    assert engine.preprocess_frame(bytearray(b"not an image")) is None
@@ -0,0 +1,73 @@
+import numpy as np
+import pytest
+
+from biometric_engine import (
+    _CODE_BYTES, _CODE_CENTER, _FEATURE_DIM, _code_norm, _hamming_fraction, _iris_code
+)
+
+
+def _ranks(values):
+    return np.argsort(np.argsort(values))
+
+
+def test_codes_are_stable():
+    # Stored templates depend on the seeded projection planes; changing them
+    # invalidates every enrolled code
+    code = _iris_code(np.linspace(0, 0.2, _FEATURE_DIM))
+    assert code.dtype == np.uint8 and code.size == _CODE_BYTES + 4
+    assert code.tobytes().hex() == (
+        "81649ea5823c827fc75b9610243561f37d3af0430f5b2a6a9e6ed49439a685db"
+        "3bceeaa7436e25b964dd254ceab949f96d3f0242c48e21d5e495f2b1fbf09484"
+        "d43e943f"
+    )
+
+
+def test_hamming_fraction_estimates_angle():
+    rng = np.random.default_rng(11)
+    base = rng.standard_normal(_FEATURE_DIM)
+    base /= np.linalg.norm(base)
+    ortho = rng.standard_normal(_FEATURE_DIM)
+    ortho -= np.dot(ortho, base) * base
+    ortho /= np.linalg.norm(ortho)
+    
+    # Angles are measured about the reference template
+    code = _iris_code(_CODE_CENTER + 0.01 * base)
+    assert _code_norm(code) == pytest.approx(0.01, rel=1e-4)
+    for angle in np.linspace(0, np.pi, 9):
+        other = _CODE_CENTER + 0.02 * (np.cos(angle) * base + np.sin(angle) * ortho)
+        hamming = _hamming_fraction(code, _iris_code(other))
+        # 512 bits: the estimate's standard deviation is at most ~0.022
+        assert abs(hamming - angle / np.pi) < 0.08
+
+
+def test_distinct_subjects_get_distinct_codes(templates):
+    codes = {_iris_code(t).tobytes() for t in templates}
+    assert len(codes) == len(templates)
+
+
+def test_code_scores_track_float_scores(engine, templates):
+    exact_distances = []
+    code_distances = []
+    for i, t1 in enumerate(templates):
+        for t2 in templates[i + 1:]:
+            exact = engine.match_templates(t1, t2)
+            coded = engine.match_templates(_iris_code(t1), t2)
+            # Distances between subjects are ~1e-3, so bound them relatively
+            assert coded['distance'] == pytest.approx(exact['distance'], rel=0.25)
+            assert coded['similarity'] == pytest.approx(exact['similarity'], abs=1e-5)
+            assert coded['match'] == exact['match']
+            exact_distances.append(exact['distance'])
+            code_distances.append(coded['distance'])
+    
+    # Codes must order pairs of subjects the way the float templates do
+    assert np.corrcoef(_ranks(exact_distances), _ranks(code_distances))[0, 1] > 0.95
+
+
+def test_encrypted_template_matches_as_code(engine, templates):
+    encrypted = engine.encrypt_template({'template': templates[0]})
+    assert np.array_equal(engine.decrypt_template(encrypted), _iris_code(templates[0]))
+    
+    result = engine.match_templates(encrypted, templates[0])
+    assert result['match']
+    assert result['hamming_distance'] == 0.0
+    assert result['similarity'] == pytest.approx(1.0)
@@ -0,0 +1,64 @@
+import gzip
+import time
+import uuid
+import zlib
+
+import pytest
+from fastapi.testclient import TestClient
+
+import server
+
+
+@pytest.fixture(scope="module")
+def client():
+    # No context manager: startup (index creation, audit flusher) needs Mongo
+    return TestClient(server.app)
+
+
+def _post_gzip(client, path, body):
+    return client.post(path, content=body, headers={
+        'Content-Encoding': 'gzip', 'Content-Type': 'application/json'
+    })
+
+
+def test_gzip_body_past_limit_is_rejected(client):
+    # Highly compressible: a few KB on the wire, just over the cap once inflated
+    payload = b'{"account_number":"' + b'0' * server._MAX_GZIP_BODY_BYTES + b'","frames":[]}'
+    body = zlib.compress(payload, 9, wbits=16 + zlib.MAX_WBITS)
+    assert len(body) < 100_000
+    
+    response = _post_gzip(client, '/api/verify', body)
+    assert response.status_code == 413
+
+
+def test_invalid_gzip_body_is_rejected(client):
+    response = _post_gzip(client, '/api/enroll', b'not gzip data')
+    assert response.status_code == 400
+
+
+def test_gzip_only_accepted_on_frame_routes(client):
+    body = gzip.compress(b'{"account_number":"1","type":"check"}')
+    response = _post_gzip(client, '/api/transaction', body)
+    assert response.status_code == 400
+
+
+def test_new_id_is_uuid7():
+    value = uuid.UUID(server._new_id())
+    assert value.version == 7
+    assert value.variant == uuid.RFC_4122
+
+
+def test_new_id_embeds_current_time():
+    before = time.time_ns() // 1_000_000
+    value = uuid.UUID(server._new_id())
+    after = time.time_ns() // 1_000_000
+    assert before <= value.int >> 80 <= after
+
+
+def test_new_ids_are_time_ordered():
+    ids = []
+    for _ in range(5):
+        ids.append(server._new_id())
+        time.sleep(0.002)
+    assert ids == sorted(ids)
+    assert len(set(ids)) == len(ids)
@@ -0,0 +1,75 @@
+import numpy as np
+import pytest
+
+from biometric_engine import IrisBiometricEngine, TemplateGallery, _iris_code
+
+
+@pytest.fixture(scope="module")
+def enrolled(engine, templates):
+    """Stored iris codes, as decrypt_template returns them"""
+    return [engine.decrypt_template(engine.encrypt_template({'template': t})) for t in templates]
+
+
+def _ids(n):
+    return [f"user{i}" for i in range(n)]
+
+
+def test_match_probe_agrees_with_match_templates(engine, templates, enrolled):
+    gallery = TemplateGallery(enrolled, ids=_ids(len(enrolled)))
+    
+    for probe in templates:
+        result = gallery.match_probe(probe)
+        
+        scores = [engine.match_templates(code, probe) for code in enrolled]
+        best = int(np.argmin([s['distance'] for s in scores]))
+        assert result['index'] == best
+        assert result['id'] == f"user{best}"
+        assert result['match'] == scores[best]['match']
+        for key in ('distance', 'similarity', 'confidence', 'hamming_distance'):
+            assert result[key] == pytest.approx(scores[best][key], abs=1e-9)
+
+
+def test_match_probe_finds_enrolled_subject(templates, enrolled):
+    gallery = TemplateGallery(enrolled)
+    for i, probe in enumerate(templates):
+        result = gallery.match_probe(probe)
+        assert result['index'] == i
+        assert result['hamming_distance'] == 0.0
+        assert result['distance'] == pytest.approx(0.0, abs=1e-6)
+
+
+def test_float_templates_are_encoded(templates, enrolled):
+    np.testing.assert_array_equal(TemplateGallery(templates).codes, TemplateGallery(enrolled).codes)
+
+
+def test_ids_must_match_templates(enrolled):
+    with pytest.raises(ValueError):
+        TemplateGallery(enrolled[:3], ids=["a", "b"])
+
+
+def test_bytes_round_trip_keeps_ids(enrolled):
+    ids = _ids(len(enrolled))
+    restored = TemplateGallery.from_bytes(TemplateGallery(enrolled, ids=ids).to_bytes())
+    np.testing.assert_array_equal(restored.codes, np.vstack(enrolled))
+    assert restored.ids == ids
+
+
+def test_from_bytes_rejects_other_payloads():
+    with pytest.raises(ValueError):
+        TemplateGallery.from_bytes(b"not a gallery")
+
+
+def test_encrypt_decrypt_gallery_round_trip(engine, templates, enrolled):
+    ids = _ids(len(enrolled))
+    encrypted = engine.encrypt_gallery(TemplateGallery(enrolled, ids=ids))
+    assert isinstance(encrypted, bytes)
+    
+    restored = engine.decrypt_gallery(encrypted)
+    np.testing.assert_array_equal(restored.codes, np.vstack(enrolled))
+    assert restored.ids == ids
+    assert restored.match_probe(_iris_code(templates[4]))['id'] == "user4"
+
+
+def test_decrypt_gallery_with_wrong_key(engine, enrolled):
+    encrypted = engine.encrypt_gallery(TemplateGallery(enrolled))
+    assert IrisBiometricEngine(encryption_key="other_key").decrypt_gallery(encrypted) is None